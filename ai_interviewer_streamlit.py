@@ -1,17 +1,42 @@
 import streamlit as st
+import io
 import os
 import pathlib
-import pdfplumber
-import docx
-import google.generativeai as genai
-from google.api_core.exceptions import ClientError, RetryError
+import re
+import datetime
+import collections
+import threading
+from google import genai
+from google.genai import types
+from google.genai.errors import APIError, ClientError
 from dotenv import load_dotenv  # Imports the library to read .env files
 
 # --- LOAD ENVIRONMENT VARIABLES ---
-load_dotenv()
+# Streamlit re-executes this script on every interaction. load_dotenv() exports the
+# key into os.environ, so after the first run (or in production) .env isn't read again
+if not os.getenv("GEMINI_API_KEY"):
+    load_dotenv()
 
 # --- CONFIGURATION ---
 API_KEY = os.getenv("GEMINI_API_KEY")
+MODEL_NAME = "gemini-2.5-flash-preview-09-2025"
+
+# How long Gemini keeps the cached system instruction + resume between turns
+CACHE_TTL = datetime.timedelta(minutes=30)
+
+# Uploaded PDFs are kept by Gemini for 48 hours; reuse them for a little less than that
+UPLOADED_FILE_TTL = datetime.timedelta(hours=47)
+
+# DOCX resumes longer than this (after whitespace cleanup) are cut off before prompting
+MAX_RESUME_CHARS = 6000
+
+# Only the latest messages get their own chat bubble; older ones are collapsed
+RECENT_MESSAGE_COUNT = 10
+ROLE_LABELS = {"ai": "Interviewer", "user": "You"}
+
+# Displayed history is bounded; past SUMMARIZE_AFTER messages the older ones are summarized
+MAX_MESSAGES = 200
+SUMMARIZE_AFTER = 40
 
 # System instruction to define the AI's role
 SYSTEM_INSTRUCTION = """
@@ -19,7 +44,7 @@ You are a professional, rigorous, and helpful AI Technical Interviewer. Your goa
 Your persona is that of a senior engineer or hiring manager at a top tech company. You are thorough, fair, and insightful.
 
 Your process is as follows:
-1.  You will be given the candidate's resume text first.
+1.  You will be given the candidate's resume first.
 2.  You will start the interview by asking a single, relevant opening question.
 3.  You will then ask **only one question at a time.** Do not ask multiple questions in one turn.
 4.  Wait for the user's answer before asking your next question.
@@ -34,177 +59,334 @@ Your process is as follows:
 """
 
 # --- STYLING (NEW!) ---
-# We'll inject custom CSS with st.markdown
-page_style = """
-<style>
-/* --- Main App Styling --- */
-@import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap');
-
-body {
-    font-family: 'Inter', sans-serif;
-}
-
-/* Set dark background */
-[data-testid="stAppViewContainer"] {
-    background-color: #0F172A; /* Dark Slate Blue */
-    color: #E2E8F0; /* Light Slate */
-}
-
-/* Style headers */
-h1, h2, h3, h4, h5, h6 {
-    color: #FFFFFF; /* White text for titles */
-    font-weight: 600;
-}
-
-/* --- Chat Styling --- */
-[data-testid="stChatInput"] {
-    background-color: #1E293B; /* Darker Slate */
-    border-top: 1px solid #334155;
-}
-
-[data-testid="stChatMessage"] {
-    padding: 1rem;
-    border-radius: 0.5rem;
-    margin-bottom: 1rem;
-}
-
-/* AI chat bubble */
-[data-testid="stChatMessage"]:has(span[data-testid="chat-avatar-ai"]) {
-    background-color: #1E293B; /* Darker Slate */
-    color: #E2E8F0;
-}
-
-/* User chat bubble */
-[data-testid="stChatMessage"]:has(span[data-testid="chat-avatar-user"]) {
-    background-color: #334155; /* Mid Slate */
-    color: #FFFFFF;
-}
-
-/* --- Button Styling --- */
-[data-testid="stButton"] button {
-    background-color: #3B82F6; /* Bright Blue */
-    color: #FFFFFF;
-    border: none;
-    border-radius: 0.5rem;
-    padding: 0.75rem 1.25rem;
-    font-weight: 600;
-    transition: background-color 0.2s ease, transform 0.2s ease;
-}
-
-[data-testid="stButton"] button:hover {
-    background-color: #2563EB; /* Darker Blue */
-    transform: scale(1.02);
-}
-
-[data-testid="stButton"] button:active {
-    background-color: #1D4ED8; /* Even Darker Blue */
-    transform: scale(0.98);
-}
-
-/* Make the "End Interview" button stand out */
-[data-testid="stButton"] button:contains("End Interview") {
-    background-color: #EF4444; /* Red */
-}
-
-[data-testid="stButton"] button:contains("End Interview"):hover {
-    background-color: #DC2626; /* Darker Red */
-}
-
-/* --- File Uploader Styling --- */
-[data-testid="stFileUploader"] {
-    background-color: #1E293B;
-    border: 1px dashed #334155;
-    border-radius: 0.5rem;
-    padding: 1rem;
-}
-
-[data-testid="stFileUploader"] label {
-    color: #E2E8F0;
-}
-
-[data-testid="stFileUploader"] [data-testid="stButton"] button {
-    background-color: #334155;
-    color: #E2E8F0;
-}
-
-[data-testid="stFileUploader"] [data-testid="stButton"] button:hover {
-    background-color: #475569;
-}
-
-/* --- Expander Styling --- */
-[data-testid="stExpander"] {
-    background-color: #1E293B;
-    border-radius: 0.5rem;
-}
-
-[data-testid="stExpander"] summary {
-    color: #E2E8F0;
-    font-weight: 600;
-}
-</style>
-"""
-
-# --- FILE EXTRACTION ---
-
-def extract_text_from_file(uploaded_file) -> str | None:
-    """Extracts text from an uploaded PDF or DOCX file."""
-    text = ""
+# Minified stylesheet shipped next to this script; we inject it with st.html
+STYLE_PATH = pathlib.Path(__file__).with_name("style.css")
+
+@st.cache_data
+def get_page_style() -> str:
+    """Returns the custom CSS injected into every page."""
+    return f"<style>{STYLE_PATH.read_text(encoding='utf-8')}</style>"
+
+# --- RESUME LOADING ---
+
+@st.cache_data(ttl=UPLOADED_FILE_TTL, show_spinner=False)
+def _upload_pdf(_client, file_bytes: bytes, file_name: str) -> types.File:
+    """Uploads PDF bytes to the Gemini File API, cached on the file's content."""
+    return _client.files.upload(
+        file=io.BytesIO(file_bytes),
+        config=types.UploadFileConfig(mime_type="application/pdf", display_name=file_name),
+    )
+
+@st.cache_data(show_spinner=False)
+def _extract_docx_text(file_bytes: bytes) -> str:
+    """Extracts text from DOCX bytes, cached on the file's content."""
+    # Imported lazily so reruns that never parse a file don't pay for it
+    import docx
+
+    # Use docx to open the bytes as a file-like object
+    doc = docx.Document(io.BytesIO(file_bytes))
+    return normalize_resume_text("\n".join(para.text for para in doc.paragraphs))
+
+def normalize_resume_text(text: str) -> str:
+    """Collapses redundant whitespace and caps the resume at MAX_RESUME_CHARS."""
+    text = re.sub(r"[ \t\f\v]+", " ", text)
+    text = re.sub(r"\s*\n\s*", "\n", text)
+    return text.strip()[:MAX_RESUME_CHARS].rstrip()
+
+def load_resume(client, uploaded_file) -> types.Part | None:
+    """Turns an uploaded PDF or DOCX file into a prompt part for Gemini."""
     try:
-        # Get file extension from the uploaded file's name
-        file_name = uploaded_file.name
-        file_extension = pathlib.Path(file_name).suffix
+        # Re-uploading the same file is served from the cache instead of re-processed
+        file_bytes = uploaded_file.getvalue()
+        file_extension = pathlib.Path(uploaded_file.name).suffix
 
         if file_extension == ".pdf":
-            # Use pdfplumber to open the file-like object
-            with pdfplumber.open(uploaded_file) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-            
+            # Gemini reads PDFs natively (layout, tables), so the file is referenced by URI
+            resume_file = _upload_pdf(client, file_bytes, uploaded_file.name)
+            return types.Part.from_uri(file_uri=resume_file.uri, mime_type=resume_file.mime_type)
+
         elif file_extension == ".docx":
-            # Use docx to open the file-like object
-            doc = docx.Document(uploaded_file)
-            for para in doc.paragraphs:
-                text += para.text + "\n"
-        
+            # The File API doesn't take DOCX, so its text is extracted locally instead
+            text = _extract_docx_text(file_bytes)
+            if not text:
+                st.warning("Extracted text is empty. The file might be image-based or corrupt.")
+                return None
+            return types.Part(text=f"--- RESUME TEXT ---\n{text}\n--- END RESUME TEXT ---")
+
         else:
             st.error(f"Unsupported file type: {file_extension}. Please upload .pdf or .docx.")
             return None
-            
-        if not text.strip():
-            st.warning("Extracted text is empty. The file might be image-based or corrupt.")
-            return None
-            
-        return text.strip()
 
+    except APIError as e:
+        st.error(f"An API error occurred while uploading your resume: {e}")
+        return None
     except Exception as e:
         st.error(f"Error reading file: {e}")
         return None
 
 # --- AI MODEL SETUP ---
 
+# st.cache_resource is the process-wide singleton here: a module-level global would be
+# reset on every rerun, since Streamlit re-executes this script. The client holds no
+# per-user state (chats are created per session), so every session shares it.
 @st.cache_resource
-def setup_ai_model():
-    """Configures and returns the Gemini model."""
+def setup_ai_client():
+    """Creates and returns the Gemini client shared by all sessions."""
     # Check if the API key was loaded successfully
     if not API_KEY:
         st.error("GEMINI_API_KEY not found. Make sure it's in your .env file.")
         st.stop()
         
     try:
-        # Configure the Generative AI library
-        genai.configure(api_key=API_KEY)
-        model = genai.GenerativeModel(
-            # --- UPDATED MODEL NAME ---
-            model_name="gemini-2.5-flash-preview-09-2025", 
-            system_instruction=SYSTEM_INSTRUCTION
-        )
-        return model
+        return genai.Client(api_key=API_KEY)
     except Exception as e:
-        st.error(f"Failed to configure AI model: {e}")
+        st.error(f"Failed to configure AI client: {e}")
         st.stop()
 
+def warm_up_connection(client):
+    """Opens the connection to Gemini ahead of the first real request."""
+    try:
+        # Any cheap call works; every service shares the client's HTTP connection pool
+        client.models.get(model=MODEL_NAME)
+    except Exception:
+        # Warm-up is best effort; the real request will surface any error
+        pass
+
+def stream_text(response_stream):
+    """Yields the text of each streamed chunk, skipping chunks without any."""
+    for chunk in response_stream:
+        if chunk.text:
+            yield chunk.text
+
+# --- CONTEXT CACHING ---
+
+def create_resume_cache(client, resume_part: types.Part):
+    """Uploads the system instruction and resume once as cached context."""
+    return client.caches.create(
+        model=MODEL_NAME,
+        config=types.CreateCachedContentConfig(
+            system_instruction=SYSTEM_INSTRUCTION,
+            contents=[types.Content(role="user", parts=[resume_part])],
+            ttl=f"{int(CACHE_TTL.total_seconds())}s",
+        ),
+    )
+
+def start_cached_chat(client, cache, history=None):
+    """Starts a chat session on top of a resume cache."""
+    st.session_state.cache_name = cache.name
+    st.session_state.cache_expires = datetime.datetime.now(datetime.timezone.utc) + CACHE_TTL
+    return client.chats.create(
+        model=MODEL_NAME,
+        config=types.GenerateContentConfig(cached_content=cache.name),
+        history=history,
+    )
+
+def keep_resume_cache_alive(client):
+    """Extends the resume cache's TTL, recreating it if it already expired."""
+    cache_name = st.session_state.get("cache_name")
+    if not cache_name:
+        return
+
+    # Only pay for the extra round trip once half the TTL has been used up
+    remaining = st.session_state.cache_expires - datetime.datetime.now(datetime.timezone.utc)
+    if remaining > CACHE_TTL / 2:
+        return
+
+    try:
+        client.caches.update(
+            name=cache_name,
+            config=types.UpdateCachedContentConfig(ttl=f"{int(CACHE_TTL.total_seconds())}s"),
+        )
+        st.session_state.cache_expires = datetime.datetime.now(datetime.timezone.utc) + CACHE_TTL
+    except ClientError as e:
+        if e.code != 404:
+            raise
+        # The cache is gone; rebuild it and carry the conversation over
+        cache = create_resume_cache(client, st.session_state.resume_part)
+        history = st.session_state.chat_session.get_history()
+        st.session_state.chat_session = start_cached_chat(client, cache, history=history)
+
+# --- TRANSCRIPT RENDERING ---
+
+def format_transcript(messages) -> str:
+    """Formats chat messages as a single Markdown block."""
+    return "\n\n".join(
+        f"**{ROLE_LABELS.get(msg['role'], msg['role'])}:**\n\n{msg['content']}" for msg in messages
+    )
+
+def compress_message_history(client):
+    """Replaces all but the recent messages with a single summary message.
+
+    Only the displayed history is compressed; the chat session keeps the full
+    conversation for the model.
+    """
+    messages = list(st.session_state.messages)
+    if len(messages) <= SUMMARIZE_AFTER:
+        return
+
+    older = messages[:-RECENT_MESSAGE_COUNT]
+    recent = messages[-RECENT_MESSAGE_COUNT:]
+    summary_prompt = f"""
+    Summarize the following part of an interview transcript in a short paragraph.
+    Keep the topics covered and how well the candidate answered. Do not ask a question.
+    --- TRANSCRIPT ---
+    {format_transcript(older)}
+    --- END TRANSCRIPT ---
+    """
+    try:
+        summary = client.models.generate_content(model=MODEL_NAME, contents=summary_prompt).text
+    except Exception:
+        # The summary only trims the display, so keep the full history if it fails
+        return
+
+    summary_message = {"role": "ai", "content": f"[Earlier context summarized: {summary.strip()}]"}
+    st.session_state.messages = collections.deque([summary_message, *recent], maxlen=MAX_MESSAGES)
+
+
+# --- PAGES ---
+
+def render_start_page(client):
+    """Upload page (State: START)."""
+    # Everything goes in a placeholder so it can be cleared when the interview begins
+    start_page = st.empty()
+    with start_page.container():
+        st.title("📝 AI Interviewer")
+        st.write("Welcome! Upload your resume (.pdf or .docx) to begin your technical interview.")
+        
+        uploaded_file = st.file_uploader("Choose your resume", type=["pdf", "docx"])
+        
+        if uploaded_file is None:
+            return
+
+        # Resolve DNS and do the TLS handshake while the resume is being read
+        threading.Thread(target=warm_up_connection, args=(client,), daemon=True).start()
+
+        with st.spinner("Analyzing your resume..."):
+            resume_part = load_resume(client, uploaded_file)
+            
+            if not resume_part:
+                return
+
+            try:
+                st.session_state.resume_part = resume_part
+                try:
+                    cache = create_resume_cache(client, resume_part)
+                except ClientError:
+                    # e.g. the resume is below the model's minimum cacheable size
+                    cache = None
+
+                if cache:
+                    st.session_state.chat_session = start_cached_chat(client, cache)
+                    initial_prompt = "Please ask your first question."
+                else:
+                    st.session_state.chat_session = client.chats.create(
+                        model=MODEL_NAME,
+                        config=types.GenerateContentConfig(system_instruction=SYSTEM_INSTRUCTION),
+                    )
+                    initial_prompt = [
+                        resume_part,
+                        "Here is the candidate's resume. Please analyze it and start the interview by asking your first question.",
+                    ]
+                response = st.session_state.chat_session.send_message(initial_prompt)
+                st.session_state.messages.append({"role": "ai", "content": response.text})
+                st.session_state.interview_state = "INTERVIEW"
+                
+            except APIError as e:
+                st.error(f"An API error occurred: {e}")
+                return
+            except Exception as e:
+                st.error(f"An unexpected error occurred: {e}")
+                return
+
+    # Show the first question in this same run instead of paying for a full st.rerun()
+    start_page.empty()
+    render_interview_page(client)
+
+def render_interview_page(client):
+    """Interview chat page (State: INTERVIEW)."""
+    st.title("Interview in Progress...")
+
+    chat_turn(client)
+
+    st.write("") # Add a little space
+    # This button will now be styled red because of the CSS
+    if st.button("End Interview & Get Feedback", type="primary"):
+        st.session_state.interview_state = "FEEDBACK"
+        st.rerun() 
+
+@st.fragment
+def chat_turn(client):
+    """Chat history and answer input; reruns on its own when an answer is sent."""
+    messages = list(st.session_state.messages)
+    older = messages[:-RECENT_MESSAGE_COUNT]
+    recent = messages[-RECENT_MESSAGE_COUNT:]
+    if older:
+        with st.expander(f"Earlier in this interview ({len(older)} messages)"):
+            st.markdown(format_transcript(older))
+
+    for msg in recent:
+        with st.chat_message(msg["role"]):
+            st.markdown(msg["content"])
+    
+    if user_answer := st.chat_input("Your answer..."):
+        st.session_state.messages.append({"role": "user", "content": user_answer})
+        with st.chat_message("user"):
+            st.markdown(user_answer)
+            
+        try:
+            keep_resume_cache_alive(client)
+            stream = st.session_state.chat_session.send_message_stream(user_answer)
+            with st.chat_message("ai"):
+                full_response = st.write_stream(stream_text(stream))
+            st.session_state.messages.append({"role": "ai", "content": full_response})
+            compress_message_history(client)
+        except APIError as e:
+            st.error(f"An API error occurred: {e}")
+        except Exception as e:
+            st.error(f"An unexpected error occurred: {e}")
+
+def render_feedback_page(client):
+    """Feedback page (State: FEEDBACK)."""
+    st.title("Interview Feedback")
+    
+    st.write("---") # Simple separator
+    with st.expander("Show Full Interview Transcript"):
+        st.markdown(format_transcript(st.session_state.messages))
+    st.write("---")
+
+    st.subheader("Your Performance Review")
+
+    # The review is generated once; later reruns of this page just redisplay it
+    if st.session_state.feedback:
+        st.markdown(st.session_state.feedback)
+    else:
+        try:
+            feedback_prompt = """
+            The interview is now complete. Please provide comprehensive feedback on my performance.
+            Analyze all my answers (the conversation history) and my resume. 
+            Tell me my strengths, weaknesses, and how well my knowledge appears based on our interaction.
+            Use Markdown for formatting (e.g., bolding, bullet points).
+            """
+            keep_resume_cache_alive(client)
+            feedback_stream = st.session_state.chat_session.send_message_stream(feedback_prompt)
+            st.session_state.feedback = st.write_stream(stream_text(feedback_stream))
+            
+        except APIError as e:
+            st.error(f"An API error occurred while generating feedback: {e}")
+        except Exception as e:
+            st.error(f"An unexpected error occurred: {e}")
+
+    st.write("") 
+    if st.button("Start New Interview"):
+        st.session_state.clear()
+        st.rerun()
+
+PAGES = {
+    "START": render_start_page,
+    "INTERVIEW": render_interview_page,
+    "FEEDBACK": render_feedback_page,
+}
+
 
 # --- MAIN APP LOGIC ---
 
@@ -213,112 +395,25 @@ def main():
     st.set_page_config(page_title="AI Interviewer", page_icon="🎙️", layout="centered")
     
     # --- INJECT THE CUSTOM CSS (NEW!) ---
-    st.markdown(page_style, unsafe_allow_html=True)
+    st.html(get_page_style())
 
-    # Load the AI model
-    model = setup_ai_model()
+    # Load the AI client
+    client = setup_ai_client()
 
     # --- Initialize Session State ---
     if "chat_session" not in st.session_state:
         st.session_state.chat_session = None
+    if "cache_name" not in st.session_state:
+        st.session_state.cache_name = None
     if "messages" not in st.session_state:
-        st.session_state.messages = []
+        st.session_state.messages = collections.deque(maxlen=MAX_MESSAGES)
+    if "feedback" not in st.session_state:
+        st.session_state.feedback = None
     if "interview_state" not in st.session_state:
         st.session_state.interview_state = "START" 
 
-    # --- 1. UPLOAD PAGE (State: START) ---
-    if st.session_state.interview_state == "START":
-        st.title("📝 AI Interviewer")
-        st.write("Welcome! Upload your resume (.pdf or .docx) to begin your technical interview.")
-        
-        uploaded_file = st.file_uploader("Choose your resume", type=["pdf", "docx"])
-        
-        if uploaded_file is not None:
-            with st.spinner("Analyzing your resume..."):
-                resume_text = extract_text_from_file(uploaded_file)
-                
-                if resume_text:
-                    try:
-                        st.session_state.chat_session = model.start_chat()
-                        initial_prompt = f"""
-                        Here is the candidate's resume. Please analyze it and start the interview by asking your first question.
-                        --- RESUME TEXT ---
-                        {resume_text}
-                        --- END RESUME TEXT ---
-                        """
-                        response = st.session_state.chat_session.send_message(initial_prompt)
-                        st.session_state.messages.append({"role": "ai", "content": response.text})
-                        st.session_state.interview_state = "INTERVIEW"
-                        st.rerun() 
-                        
-                    except (ClientError, RetryError) as e:
-                        st.error(f"An API error occurred: {e}")
-                    except Exception as e:
-                        st.error(f"An unexpected error occurred: {e}")
-
-    # --- 2. INTERVIEW CHAT PAGE (State: INTERVIEW) ---
-    elif st.session_state.interview_state == "INTERVIEW":
-        st.title("Interview in Progress...")
-
-        for msg in st.session_state.messages:
-            with st.chat_message(msg["role"]):
-                st.markdown(msg["content"])
-        
-        if user_answer := st.chat_input("Your answer..."):
-            st.session_state.messages.append({"role": "user", "content": user_answer})
-            with st.chat_message("user"):
-                st.markdown(user_answer)
-                
-            with st.spinner("AI is thinking..."):
-                try:
-                    response = st.session_state.chat_session.send_message(user_answer)
-                    st.session_state.messages.append({"role": "ai", "content": response.text})
-                    with st.chat_message("ai"):
-                        st.markdown(response.text)
-                except (ClientError, RetryError) as e:
-                    st.error(f"An API error occurred: {e}")
-                except Exception as e:
-                    st.error(f"An unexpected error occurred: {e}")
-
-        st.write("") # Add a little space
-        # This button will now be styled red because of the CSS
-        if st.button("End Interview & Get Feedback", type="primary"):
-            st.session_state.interview_state = "FEEDBACK"
-            st.rerun() 
-
-    # --- 3. FEEDBACK PAGE (State: FEEDBACK) ---
-    elif st.session_state.interview_state == "FEEDBACK":
-        st.title("Interview Feedback")
-        
-        st.write("---") # Simple separator
-        with st.expander("Show Full Interview Transcript"):
-            for msg in st.session_state.messages:
-                with st.chat_message(msg["role"]):
-                    st.markdown(msg["content"])
-        st.write("---")
-
-        with st.spinner("Generating your feedback..."):
-            try:
-                feedback_prompt = """
-                The interview is now complete. Please provide comprehensive feedback on my performance.
-                Analyze all my answers (the conversation history) and my resume. 
-                Tell me my strengths, weaknesses, and how well my knowledge appears based on our interaction.
-                Use Markdown for formatting (e.g., bolding, bullet points).
-                """
-                feedback_response = st.session_state.chat_session.send_message(feedback_prompt)
-                
-                st.subheader("Your Performance Review")
-                st.markdown(feedback_response.text)
-                
-            except (ClientError, RetryError) as e:
-                st.error(f"An API error occurred while generating feedback: {e}")
-            except Exception as e:
-                st.error(f"An unexpected error occurred: {e}")
-
-        st.write("") 
-        if st.button("Start New Interview"):
-            st.session_state.clear()
-            st.rerun()
+    # --- Render the page for the current state ---
+    PAGES[st.session_state.interview_state](client)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file